@@ -0,0 +1,16 @@
+# cython: language_level=3
+"""
+Compiled helpers for the hot per-element traversal in VSDXExtractor
+
+Build with: python setup.py build_ext --inplace
+The extractor falls back to pure Python when this module isn't built.
+"""
+
+
+cpdef Py_ssize_t count_elements(object root):
+    """Count the descendant elements of an XML node"""
+    cdef Py_ssize_t n = 0
+    for _ in root.iter():
+        n += 1
+    # root.iter() includes the root itself; callers want descendants only
+    return n - 1
@@ -3,13 +3,16 @@ Streamlit Web Interface for VSDX Extraction Tool
 """
 
 import streamlit as st
+import gzip
+import hashlib
+import io
 import os
 import json
+import pickle
 import zipfile
 from pathlib import Path
-import tempfile
 import shutil
-from vsdx_extractor import VSDXExtractor
+from vsdx_extractor import PageInfo, VSDXExtractor
 from gemini_integration import GeminiAnalyzer
 from visualization import create_extraction_visualization
 import pandas as pd
@@ -21,6 +24,64 @@ st.set_page_config(
     layout="wide"
 )
 
+# Disk cache for extraction results, keyed by content hash of the upload
+EXTRACT_CACHE_DIR = Path.home() / ".cache" / "vsdx_extract"
+
+@st.cache_resource
+def get_gemini_analyzer(api_key: str) -> GeminiAnalyzer:
+    """
+    Build (or reuse) a GeminiAnalyzer for the given API key
+
+    Keeps the configured client and model across widget re-runs instead
+    of re-instantiating on every "Extract and Analyze" click.
+    """
+    return GeminiAnalyzer(api_key)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_extract(file_bytes: bytes) -> dict:
+    """
+    Extract a VSDX from raw bytes, memoized on a BLAKE2b content hash
+
+    Re-uploads of the same file skip ZIP decompression and XML parsing
+    entirely: results are reused from Streamlit's in-session cache and
+    from a gzipped pickle on disk across sessions.
+    """
+    content_hash = hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+    cache_path = EXTRACT_CACHE_DIR / f"{content_hash}.pkl.gz"
+
+    if cache_path.exists():
+        try:
+            with gzip.open(cache_path, 'rb') as f:
+                result = pickle.load(f)
+            # Entries written before pages became PageInfo hold plain dicts
+            result['pages'] = [
+                PageInfo(**p) if isinstance(p, dict) else p for p in result['pages']
+            ]
+            # The download package walks output_dir, so a hit is only
+            # usable while the extracted files still exist (they won't in
+            # a fresh session served purely from the pickle)
+            if Path(result.get('output_dir', '')).is_dir():
+                result['content_hash'] = content_hash
+                return result
+        except Exception:
+            # Corrupt or stale cache entry - fall through and re-extract
+            pass
+
+    extractor = VSDXExtractor()
+    result = extractor.extract_vsdx_bytes(io.BytesIO(file_bytes))
+    result['content_hash'] = content_hash
+
+    if result['success']:
+        try:
+            EXTRACT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with gzip.open(cache_path, 'wb') as f:
+                pickle.dump(result, f)
+        except Exception:
+            # Caching is best-effort; extraction already succeeded
+            pass
+
+    return result
+
 def main():
     st.title("📊 VSDX Extraction Tool")
     st.markdown("Upload a VSDX (Visio) file to extract its contents and analyze with AI")
@@ -40,6 +101,13 @@ def main():
             os.environ["GEMINI_API_KEY"] = gemini_api_key
             st.success("✅ Gemini API key configured")
         
+        st.markdown("---")
+
+        if st.button("🧹 Clear extraction cache"):
+            st.cache_data.clear()
+            shutil.rmtree(EXTRACT_CACHE_DIR, ignore_errors=True)
+            st.success("✅ Extraction cache cleared")
+
         st.markdown("---")
         st.markdown("### About")
         st.markdown("""
@@ -97,24 +165,27 @@ def process_vsdx_file(uploaded_file, gemini_api_key):
     status_text = st.empty()
     
     try:
-        # Step 1: Save uploaded file temporarily
-        status_text.text("📁 Saving uploaded file...")
+        # Step 1: Read uploaded file into memory
+        status_text.text("📁 Reading uploaded file...")
         progress_bar.progress(10)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.vsdx') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            temp_vsdx_path = tmp_file.name
-        
-        # Step 2: Extract VSDX
+
+        file_bytes = uploaded_file.getvalue()
+
+        # Step 2: Extract VSDX directly from memory (cached by content hash)
         status_text.text("🔧 Extracting VSDX file...")
         progress_bar.progress(30)
-        
-        extractor = VSDXExtractor()
-        result = extractor.extract_vsdx(temp_vsdx_path)
-        
+
+        result = cached_extract(file_bytes)
+
         if not result['success']:
             st.error(f"❌ Extraction failed: {result['error']}")
             return
+
+        # Rehydrate an extractor so downstream display/analysis code can
+        # use it regardless of whether the result came from the cache
+        extractor = VSDXExtractor()
+        extractor.pages_info = result['pages']
+        extractor.extracted_data = result['extracted_data']
         
         # Step 3: Display results
         status_text.text("📊 Creating visualizations...")
@@ -137,42 +208,45 @@ def process_vsdx_file(uploaded_file, gemini_api_key):
         
     except Exception as e:
         st.error(f"❌ Error processing file: {str(e)}")
-    
-    finally:
-        # Clean up temporary file
-        if 'temp_vsdx_path' in locals() and os.path.exists(temp_vsdx_path):
-            os.unlink(temp_vsdx_path)
 
 def display_extraction_results(result, extractor):
     """Display the extraction results"""
     
     st.header("📊 Extraction Results")
-    
+
+    pages = result['pages']
+
     # Summary metrics
     col1, col2, col3, col4 = st.columns(4)
-    
+
     with col1:
-        st.metric("Total Pages", len(result['pages']))
-    
+        st.metric("Total Pages", len(pages))
+
     with col2:
         st.metric("Output Directory", "✅ Created")
-    
+
     with col3:
-        total_elements = sum(page.get('elements_count', 0) for page in result['pages'])
+        total_elements = sum(page.elements_count for page in pages)
         st.metric("Total Elements", total_elements)
-    
+
     with col4:
         st.metric("Status", "✅ Success")
-    
+
     # Pages information
-    if result['pages']:
+    if pages:
         st.subheader("📄 Pages/Sheets Extracted")
-        
-        pages_df = pd.DataFrame(result['pages'])
+
+        # Columnar construction skips per-row dict hashing in pandas
+        pages_df = pd.DataFrame({
+            'name': [p.name for p in pages],
+            'filename': [p.filename for p in pages],
+            'elements_count': [p.elements_count for p in pages],
+            'root_tag': [p.root_tag for p in pages],
+        })
         st.dataframe(pages_df, use_container_width=True)
-        
+
         # Create visualization
-        fig = create_extraction_visualization(result['pages'])
+        fig = create_extraction_visualization(pages)
         if fig:
             st.plotly_chart(fig, use_container_width=True)
     
@@ -187,13 +261,13 @@ def display_extraction_results(result, extractor):
     st.subheader("💾 Download Extracted Files")
     
     if st.button("📦 Create Download Package"):
-        create_download_package(result['output_dir'])
+        create_download_package(result['output_dir'], result.get('content_hash'))
 
 def run_ai_analysis(result, extractor, api_key):
     """Run AI analysis using Gemini"""
     
     try:
-        analyzer = GeminiAnalyzer(api_key)
+        analyzer = get_gemini_analyzer(api_key)
         
         # Prepare data for analysis
         analysis_data = {
@@ -201,38 +275,45 @@ def run_ai_analysis(result, extractor, api_key):
             'pages': result['pages']
         }
         
-        # Run analysis
-        analysis_result = analyzer.analyze_extraction(analysis_data)
-        
-        if analysis_result:
-            st.header("🤖 AI Analysis")
-            st.markdown(analysis_result)
+        # Stream the analysis as it arrives instead of waiting for the full response
+        st.header("🤖 AI Analysis")
+        st.write_stream(analyzer.stream_analysis(analysis_data))
     
     except Exception as e:
         st.warning(f"⚠️ AI analysis failed: {str(e)}")
 
-def create_download_package(output_dir):
+def create_download_package(output_dir, content_hash=None):
     """Create a ZIP package of extracted files for download"""
-    
+
     try:
-        # Create ZIP file in memory
-        import io
-        zip_buffer = io.BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add all files from output directory
-            for root, dirs, files in os.walk(output_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arc_name = os.path.relpath(file_path, output_dir)
-                    zip_file.write(file_path, arc_name)
-        
-        zip_buffer.seek(0)
-        
+        # Reuse the previously built ZIP for the same upload, keyed by its
+        # content hash (directory mtime doesn't change when files inside
+        # subdirectories are rewritten)
+        cache_key = content_hash or output_dir
+
+        if st.session_state.get('zip_key') == cache_key:
+            zip_bytes = st.session_state['zip_bytes']
+        else:
+            # Create ZIP file in memory; fastest DEFLATE level since the
+            # XML payloads are small and this blocks the button click
+            zip_buffer = io.BytesIO()
+
+            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zip_file:
+                # Add all files from output directory
+                for root, dirs, files in os.walk(output_dir):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        arc_name = os.path.relpath(file_path, output_dir)
+                        zip_file.write(file_path, arc_name)
+
+            zip_bytes = zip_buffer.getvalue()
+            st.session_state['zip_key'] = cache_key
+            st.session_state['zip_bytes'] = zip_bytes
+
         # Provide download button
         st.download_button(
             label="📥 Download Extracted Files (ZIP)",
-            data=zip_buffer.getvalue(),
+            data=zip_bytes,
             file_name="vsdx_extracted_files.zip",
             mime="application/zip"
         )
@@ -3,7 +3,6 @@ Create a simple test VSDX file for demonstration purposes
 """
 
 import zipfile
-import os
 from pathlib import Path
 
 def create_test_vsdx(filename="test_diagram.vsdx"):
@@ -11,15 +10,6 @@ def create_test_vsdx(filename="test_diagram.vsdx"):
     Create a minimal test VSDX file with basic structure
     """
     
-    test_dir = "test_vsdx_content"
-    os.makedirs(test_dir, exist_ok=True)
-    
-    # Create directory structure
-    os.makedirs(f"{test_dir}/docProps", exist_ok=True)
-    os.makedirs(f"{test_dir}/visio", exist_ok=True)
-    os.makedirs(f"{test_dir}/visio/pages", exist_ok=True)
-    os.makedirs(f"{test_dir}/_rels", exist_ok=True)
-    
     # Create app.xml (document properties)
     app_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">
@@ -32,9 +22,6 @@ def create_test_vsdx(filename="test_diagram.vsdx"):
     <AppVersion>16.0000</AppVersion>
 </Properties>"""
     
-    with open(f"{test_dir}/docProps/app.xml", "w", encoding="utf-8") as f:
-        f.write(app_xml)
-    
     # Create document.xml
     document_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <VisioDocument xmlns="http://schemas.microsoft.com/office/visio/2012/main">
@@ -67,9 +54,6 @@ def create_test_vsdx(filename="test_diagram.vsdx"):
     </Pages>
 </VisioDocument>"""
     
-    with open(f"{test_dir}/visio/document.xml", "w", encoding="utf-8") as f:
-        f.write(document_xml)
-    
     # Create page1.xml
     page1_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <PageContents xmlns="http://schemas.microsoft.com/office/visio/2012/main">
@@ -102,9 +86,6 @@ def create_test_vsdx(filename="test_diagram.vsdx"):
     </Connects>
 </PageContents>"""
     
-    with open(f"{test_dir}/visio/pages/page1.xml", "w", encoding="utf-8") as f:
-        f.write(page1_xml)
-    
     # Create page2.xml
     page2_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <PageContents xmlns="http://schemas.microsoft.com/office/visio/2012/main">
@@ -133,9 +114,6 @@ def create_test_vsdx(filename="test_diagram.vsdx"):
     </Shapes>
 </PageContents>"""
     
-    with open(f"{test_dir}/visio/pages/page2.xml", "w", encoding="utf-8") as f:
-        f.write(page2_xml)
-    
     # Create [Content_Types].xml
     content_types_xml = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
@@ -147,20 +125,20 @@ def create_test_vsdx(filename="test_diagram.vsdx"):
     <Override PartName="/visio/pages/page2.xml" ContentType="application/vnd.ms-visio.page+xml"/>
 </Types>"""
     
-    with open(f"{test_dir}/[Content_Types].xml", "w", encoding="utf-8") as f:
-        f.write(content_types_xml)
-    
-    # Create the VSDX file (ZIP archive)
-    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(test_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, test_dir)
-                zipf.write(file_path, arcname)
-    
-    # Clean up temporary directory
-    import shutil
-    shutil.rmtree(test_dir)
+    # Assemble the parts in memory and write them straight into the archive,
+    # skipping the intermediate on-disk directory entirely
+    parts = {
+        "docProps/app.xml": app_xml,
+        "visio/document.xml": document_xml,
+        "visio/pages/page1.xml": page1_xml,
+        "visio/pages/page2.xml": page2_xml,
+        "[Content_Types].xml": content_types_xml,
+    }
+
+    # Create the VSDX file (ZIP archive); the fixture doesn't need max compression
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+        for arcname, data in parts.items():
+            zipf.writestr(arcname, data)
     
     print(f"✅ Created test VSDX file: {filename}")
     return filename
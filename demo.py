@@ -44,7 +44,7 @@ def run_demo():
     
     print("\n   Page Details:")
     for i, page in enumerate(summary['pages'], 1):
-        print(f"   Page {i}: {page['name']} ({page['elements_count']} elements)")
+        print(f"   Page {i}: {page.name} ({page.elements_count} elements)")
     
     # Step 4: Create visualizations
     print("\n4. Creating visualizations...")
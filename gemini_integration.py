@@ -3,12 +3,56 @@ Gemini AI Integration for VSDX Analysis
 """
 
 import google.generativeai as genai
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional
+import os
+import statistics
+from dataclasses import asdict, is_dataclass
+from typing import Dict, Iterator, List, Optional
+
+# Optional disk cache for LLM responses
+try:
+    import diskcache
+    _RESPONSE_CACHE = diskcache.Cache(os.path.expanduser("~/.cache/gemini_vsdx"))
+except ImportError:
+    _RESPONSE_CACHE = None
+
+# Responses are kept for a week; extraction data for the same prompt doesn't change
+_RESPONSE_CACHE_TTL = 7 * 86400
+
+# Configured models, keyed by API key, so repeat GeminiAnalyzer construction
+# doesn't redo genai.configure and model setup
+_MODEL_CACHE: Dict[str, genai.GenerativeModel] = {}
+
+# Above this many pages the prompt sends an aggregate summary instead of
+# every page, and prompts are kept under a rough token budget (~4 chars/token)
+_MAX_PAGES_IN_PROMPT = 30
+_MAX_PROMPT_TOKENS = 28000
+
+# Returned locally when there is nothing worth sending to the model
+_EMPTY_EXTRACTION_MESSAGE = "_(No pages were extracted — nothing to analyze.)_"
 
 logger = logging.getLogger(__name__)
 
+def _page_record(page) -> Dict:
+    """Normalize page metadata (PageInfo dataclass or plain dict) to a dict"""
+    return asdict(page) if is_dataclass(page) else page
+
+# Sent once as the model's system instruction instead of being repeated
+# inside every analysis prompt
+SYSTEM_PROMPT = """You analyze extraction results from VSDX (Microsoft Visio) files.
+Given a JSON summary of the extraction, provide a comprehensive analysis covering:
+
+1. **Document Structure Analysis:** overall organization, page complexity, element distribution patterns
+2. **Content Insights:** likely diagram types, complexity per page, potential use cases or domains
+3. **Technical Assessment:** XML structure quality, data completeness, potential issues or anomalies
+4. **Recommendations:** best practices for the extracted data, next steps, useful tools or techniques
+5. **Summary:** key takeaways and overall assessment of the extraction
+
+Format your response in clear sections with markdown formatting for readability."""
+
 class GeminiAnalyzer:
     """
     A class to integrate with Google's Gemini AI for analyzing VSDX extraction results
@@ -24,31 +68,72 @@ class GeminiAnalyzer:
         if not api_key:
             raise ValueError("Gemini API key is required")
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        
-        logger.info("Gemini AI configured successfully")
-    
-    def analyze_extraction(self, extraction_data: Dict) -> Optional[str]:
+        if api_key not in _MODEL_CACHE:
+            genai.configure(api_key=api_key)
+            _MODEL_CACHE[api_key] = genai.GenerativeModel(
+                'gemini-1.5-flash', system_instruction=SYSTEM_PROMPT
+            )
+            logger.info("Gemini AI configured successfully")
+
+        self.model = _MODEL_CACHE[api_key]
+
+    def _cached_generate(self, prompt: str) -> Optional[str]:
+        """
+        Generate content for a prompt, reusing cached responses on disk
+
+        Identical prompts (same VSDX re-analyzed) skip the LLM round trip
+        entirely when diskcache is available.
+
+        Args:
+            prompt: Prompt string to send to Gemini
+
+        Returns:
+            Response text, or None if generation fails
+        """
+        key = hashlib.sha256(prompt.encode()).hexdigest()
+
+        if _RESPONSE_CACHE is not None:
+            cached = _RESPONSE_CACHE.get(key)
+            if cached is not None:
+                logger.info("Gemini response served from cache")
+                return cached
+
+        response = self.model.generate_content(prompt)
+
+        if response and response.text:
+            if _RESPONSE_CACHE is not None:
+                _RESPONSE_CACHE.set(key, response.text, expire=_RESPONSE_CACHE_TTL)
+            return response.text
+
+        return None
+
+    def analyze_extraction(self, extraction_data: Dict, as_report: bool = False) -> Optional[str]:
         """
         Analyze the VSDX extraction results using Gemini AI
-        
+
         Args:
             extraction_data: Dictionary containing extraction results and metadata
-            
+            as_report: If True, wrap the analysis in a full markdown report
+
         Returns:
             AI analysis as a string, or None if analysis fails
         """
+        # No pages means nothing to send - skip the network call entirely
+        if not extraction_data.get('pages'):
+            return _EMPTY_EXTRACTION_MESSAGE
+
         try:
             # Prepare the prompt for Gemini
             prompt = self._create_analysis_prompt(extraction_data)
-            
-            # Generate analysis
-            response = self.model.generate_content(prompt)
-            
-            if response and response.text:
+
+            # Generate analysis (cached by prompt hash)
+            analysis = self._cached_generate(prompt)
+
+            if analysis:
                 logger.info("Gemini analysis completed successfully")
-                return response.text
+                if as_report:
+                    return self._wrap_report(extraction_data, analysis)
+                return analysis
             else:
                 logger.warning("Gemini returned empty response")
                 return None
@@ -56,7 +141,89 @@ class GeminiAnalyzer:
         except Exception as e:
             logger.error(f"Error during Gemini analysis: {str(e)}")
             return None
-    
+
+    def stream_analysis(self, extraction_data: Dict) -> Iterator[str]:
+        """
+        Stream the extraction analysis token-by-token
+
+        Args:
+            extraction_data: Dictionary containing extraction results and metadata
+
+        Yields:
+            Text chunks of the analysis as they arrive from Gemini
+        """
+        if not extraction_data.get('pages'):
+            yield _EMPTY_EXTRACTION_MESSAGE
+            return
+
+        try:
+            prompt = self._create_analysis_prompt(extraction_data)
+            key = hashlib.sha256(prompt.encode()).hexdigest()
+
+            if _RESPONSE_CACHE is not None:
+                cached = _RESPONSE_CACHE.get(key)
+                if cached is not None:
+                    logger.info("Gemini response served from cache")
+                    yield cached
+                    return
+
+            response = self.model.generate_content(prompt, stream=True)
+
+            # Accumulate the chunks so the full response can be cached
+            # for the next analysis of the same extraction
+            chunks = []
+            for chunk in response:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+
+            if chunks and _RESPONSE_CACHE is not None:
+                _RESPONSE_CACHE.set(key, "".join(chunks), expire=_RESPONSE_CACHE_TTL)
+
+        except Exception as e:
+            logger.error(f"Error during streamed Gemini analysis: {str(e)}")
+
+    async def _analyze_page_async(self, page_data: Dict) -> Optional[str]:
+        """
+        Analyze a single page without blocking, for concurrent fan-out
+
+        Args:
+            page_data: Page metadata
+
+        Returns:
+            AI analysis of the page, or None if analysis fails
+        """
+        try:
+            prompt = self._create_page_prompt(page_data)
+            response = await self.model.generate_content_async(prompt)
+
+            if response and response.text:
+                return response.text
+            return None
+
+        except Exception as e:
+            logger.error(f"Error analyzing page content: {str(e)}")
+            return None
+
+    def analyze_pages(self, pages: List[Dict]) -> List[Optional[str]]:
+        """
+        Analyze multiple pages concurrently
+
+        Fans the per-page prompts out with asyncio.gather so the wall
+        time is ~one round trip instead of one per page.
+
+        Args:
+            pages: List of page metadata dictionaries
+
+        Returns:
+            List of per-page analyses in the same order as the input
+        """
+        async def _gather():
+            tasks = [self._analyze_page_async(page) for page in pages]
+            return await asyncio.gather(*tasks)
+
+        return asyncio.run(_gather())
+
     def _create_analysis_prompt(self, extraction_data: Dict) -> str:
         """
         Create a detailed prompt for Gemini AI analysis
@@ -68,61 +235,61 @@ class GeminiAnalyzer:
             Formatted prompt string
         """
         summary = extraction_data.get('summary', {})
-        pages = extraction_data.get('pages', [])
-        
-        prompt = f"""
-        Analyze the following VSDX (Microsoft Visio) file extraction results and provide insights:
-
-        **Extraction Summary:**
-        - Total Pages: {summary.get('total_pages', 0)}
-        - Has Application Properties: {summary.get('has_app_properties', False)}
-        - Has Document Info: {summary.get('has_document_info', False)}
-
-        **Page Details:**
-        """
-        
-        for i, page in enumerate(pages, 1):
-            prompt += f"""
-        Page {i}:
-        - Name: {page.get('name', 'Unknown')}
-        - Filename: {page.get('filename', 'Unknown')}
-        - Elements Count: {page.get('elements_count', 0)}
-        - Root Tag: {page.get('root_tag', 'Unknown')}
-        """
-        
-        prompt += """
+        pages = [_page_record(p) for p in extraction_data.get('pages', [])]
 
-        **Analysis Request:**
-        Please provide a comprehensive analysis covering:
+        # Compact JSON keeps the token count low; the analysis instructions
+        # live in SYSTEM_PROMPT and are not repeated per request
+        payload = {
+            'summary': {
+                'total_pages': summary.get('total_pages', 0),
+                'has_app_properties': summary.get('has_app_properties', False),
+                'has_document_info': summary.get('has_document_info', False),
+            },
+            'pages': self._pages_payload(pages),
+        }
 
-        1. **Document Structure Analysis:**
-           - Overall document organization
-           - Page complexity assessment
-           - Element distribution patterns
+        prompt = "Analyze this VSDX extraction result:\n" + json.dumps(payload, separators=(',', ':'))
 
-        2. **Content Insights:**
-           - What type of diagrams or content this appears to be
-           - Complexity level of each page
-           - Potential use cases or domains
+        # Rough token estimate at ~4 chars/token; if the per-page detail would
+        # blow the budget, fall back to the aggregate form
+        if len(prompt) // 4 >= _MAX_PROMPT_TOKENS and isinstance(payload['pages'], list):
+            payload['pages'] = self._pages_payload(pages, aggregate=True)
+            prompt = "Analyze this VSDX extraction result:\n" + json.dumps(payload, separators=(',', ':'))
 
-        3. **Technical Assessment:**
-           - XML structure quality
-           - Data completeness
-           - Any potential issues or anomalies
-
-        4. **Recommendations:**
-           - Best practices for working with this extracted data
-           - Potential next steps for analysis
-           - Tools or techniques that might be useful
+        return prompt
 
-        5. **Summary:**
-           - Key takeaways about this VSDX file
-           - Overall assessment of the extraction success
+    @staticmethod
+    def _pages_payload(pages: List[Dict], aggregate: bool = False):
+        """
+        Build the pages portion of the analysis payload
 
-        Please format your response in clear sections with markdown formatting for readability.
+        Large documents are summarized to an aggregate (count, mean, top 5
+        by element count) instead of listing every page.
         """
-        
-        return prompt
+        if aggregate or len(pages) > _MAX_PAGES_IN_PROMPT:
+            counts = [page.get('elements_count', 0) for page in pages]
+            top_pages = sorted(pages, key=lambda p: p.get('elements_count', 0), reverse=True)[:5]
+            return {
+                'total_pages': len(pages),
+                'mean_elements': round(statistics.mean(counts), 1) if counts else 0,
+                'top_5_by_elements': [
+                    {
+                        'name': page.get('name', 'Unknown'),
+                        'elements_count': page.get('elements_count', 0),
+                    }
+                    for page in top_pages
+                ],
+            }
+
+        return [
+            {
+                'name': page.get('name', 'Unknown'),
+                'filename': page.get('filename', 'Unknown'),
+                'elements_count': page.get('elements_count', 0),
+                'root_tag': page.get('root_tag', 'Unknown'),
+            }
+            for page in pages
+        ]
     
     def analyze_page_content(self, page_data: Dict, xml_content: str = None) -> Optional[str]:
         """
@@ -136,73 +303,84 @@ class GeminiAnalyzer:
             AI analysis of the specific page
         """
         try:
-            prompt = f"""
-            Analyze this specific page from a VSDX file:
+            prompt = self._create_page_prompt(page_data, xml_content)
+
+            return self._cached_generate(prompt)
 
-            **Page Information:**
-            - Name: {page_data.get('name', 'Unknown')}
-            - Elements Count: {page_data.get('elements_count', 0)}
-            - Filename: {page_data.get('filename', 'Unknown')}
 
-            """
-            
-            if xml_content:
-                # Truncate XML content if too long
-                if len(xml_content) > 5000:
-                    xml_content = xml_content[:5000] + "... [truncated]"
-                
-                prompt += f"""
-            **XML Content Sample:**
-            ```xml
-            {xml_content}
-            ```
-            """
-            
-            prompt += """
-            Please analyze this page and provide:
-            1. What type of content this page likely contains
-            2. Complexity assessment
-            3. Key elements or patterns identified
-            4. Potential insights about the diagram structure
-            
-            Keep the analysis concise but informative.
-            """
-            
-            response = self.model.generate_content(prompt)
-            
-            if response and response.text:
-                return response.text
-            else:
-                return None
-                
         except Exception as e:
             logger.error(f"Error analyzing page content: {str(e)}")
             return None
-    
-    def generate_extraction_report(self, extraction_data: Dict) -> Optional[str]:
+
+    def _create_page_prompt(self, page_data: Dict, xml_content: str = None) -> str:
         """
-        Generate a comprehensive report of the extraction process
-        
+        Create the analysis prompt for a single page
+
+        Args:
+            page_data: Page metadata
+            xml_content: Raw XML content of the page (optional)
+
+        Returns:
+            Formatted prompt string
+        """
+        page_data = _page_record(page_data)
+
+        prompt = f"""
+        Analyze this specific page from a VSDX file:
+
+        **Page Information:**
+        - Name: {page_data.get('name', 'Unknown')}
+        - Elements Count: {page_data.get('elements_count', 0)}
+        - Filename: {page_data.get('filename', 'Unknown')}
+
+        """
+
+        if xml_content:
+            # Truncate XML content if too long
+            if len(xml_content) > 5000:
+                xml_content = xml_content[:5000] + "... [truncated]"
+
+            prompt += f"""
+        **XML Content Sample:**
+        ```xml
+        {xml_content}
+        ```
+        """
+
+        prompt += """
+        Please analyze this page and provide:
+        1. What type of content this page likely contains
+        2. Complexity assessment
+        3. Key elements or patterns identified
+        4. Potential insights about the diagram structure
+
+        Keep the analysis concise but informative.
+        """
+
+        return prompt
+
+    def _wrap_report(self, extraction_data: Dict, analysis: str) -> str:
+        """
+        Wrap an already-generated analysis in the full markdown report
+
+        Pure formatting - no additional LLM calls.
+
         Args:
             extraction_data: Complete extraction results
-            
+            analysis: Analysis text returned by the model
+
         Returns:
             Formatted report as markdown string
         """
-        try:
-            analysis = self.analyze_extraction(extraction_data)
-            
-            if not analysis:
-                return None
-            
-            # Create a structured report
-            report = f"""
+        # Accumulate chunks and join once: += on str is quadratic in the
+        # number of pages
+        parts = [f"""
 # VSDX Extraction Report
 
 ## 📊 Extraction Summary
-- **Total Pages Extracted:** {extraction_data['summary'].get('total_pages', 0)}
+- **Total Pages Extracted:** {extraction_data.get('summary', {}).get('total_pages', 0)}
 - **Processing Status:** ✅ Successful
-- **Analysis Generated:** {len(analysis.split()) if analysis else 0} words
+- **Analysis Generated:** {len(analysis.split())} words
 
 ## 🤖 AI Analysis
 
@@ -211,26 +389,34 @@ class GeminiAnalyzer:
 ## 📋 Technical Details
 
 ### Pages Processed:
-"""
-            
-            for page in extraction_data.get('pages', []):
-                report += f"""
+"""]
+
+        parts.extend(f"""
 - **{page.get('name', 'Unnamed')}**
   - File: `{page.get('filename', 'unknown.xml')}`
   - Elements: {page.get('elements_count', 0)}
 """
-            
-            report += """
+                     for page in map(_page_record, extraction_data.get('pages', [])))
+
+        parts.append("""
 
 ---
 *Report generated using Google Gemini AI*
-"""
-            
-            return report
-            
-        except Exception as e:
-            logger.error(f"Error generating extraction report: {str(e)}")
-            return None
+""")
+
+        return "".join(parts)
+
+    def generate_extraction_report(self, extraction_data: Dict) -> Optional[str]:
+        """
+        Generate a comprehensive report of the extraction process
+
+        Args:
+            extraction_data: Complete extraction results
+
+        Returns:
+            Formatted report as markdown string
+        """
+        return self.analyze_extraction(extraction_data, as_report=True)
 
 def test_gemini_connection(api_key: str) -> bool:
     """
@@ -0,0 +1,21 @@
+"""
+Optional build script for the compiled traversal helpers
+
+Run `python setup.py build_ext --inplace` to build _vsdx_walk; the
+extractor works without it via a pure-Python fallback.
+"""
+
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    raise SystemExit("Cython is required to build the optional _vsdx_walk extension")
+
+setup(
+    name="vsdx-extraction-ext",
+    ext_modules=cythonize(
+        [Extension("_vsdx_walk", ["_vsdx_walk.pyx"])],
+        annotate=True,
+    ),
+)
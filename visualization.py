@@ -2,40 +2,80 @@
 Visualization module for VSDX extraction results
 """
 
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Dict, List, Optional
+import functools
 import logging
+from dataclasses import asdict, is_dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 
-# Optional seaborn import
-try:
-    import seaborn as sns
-    HAS_SEABORN = True
-except ImportError:
-    HAS_SEABORN = False
+# Plotly and matplotlib are imported lazily inside the functions that
+# need them: importing them at module load costs 500ms-1s of startup,
+# which callers like the CLI extractor never earn back
+
+@functools.lru_cache(None)
+def _has_seaborn() -> bool:
+    """Detect optional seaborn support without paying for it at import"""
+    try:
+        import seaborn  # noqa: F401
+        return True
+    except ImportError:
+        return False
 
 logger = logging.getLogger(__name__)
 
-def create_extraction_visualization(pages_data: List[Dict]) -> Optional[go.Figure]:
+# Past this many points SVG rendering gets sluggish client-side, so the
+# scatter trace switches to WebGL and decimates the series
+_MAX_SCATTER_POINTS = 2000
+
+def _page_records(pages_data: List) -> List[Dict]:
+    """Normalize page metadata (PageInfo dataclasses or dicts) to dicts"""
+    return [asdict(p) if is_dataclass(p) else p for p in pages_data]
+
+def _ext_counts(filenames: List[str]) -> pd.Series:
+    """Count filename extensions using vectorized splits (no per-row regex)"""
+    if not filenames:
+        return pd.Series({'xml': 0})
+    return pd.Series(filenames).str.rsplit('.', n=1).str[-1].value_counts()
+
+def _extract_cols(pages_data: List) -> Tuple[List[str], np.ndarray, List[str]]:
+    """
+    Pull the plotted columns straight out of the page records
+
+    Charts that only read a couple of fields don't need a full DataFrame
+    build with dtype inference - plain lists and one int array suffice.
+    """
+    pages = _page_records(pages_data)
+    names = [p.get('name') or f"Page {i+1}" for i, p in enumerate(pages)]
+    counts = np.fromiter(
+        (p.get('elements_count', 0) for p in pages),
+        dtype=np.int32, count=len(pages)
+    )
+    filenames = [p.get('filename', 'unknown.xml') for p in pages]
+    return names, counts, filenames
+
+def create_extraction_visualization(pages_data: List[Dict], hover: bool = True) -> Optional["go.Figure"]:
     """
     Create interactive visualizations for VSDX extraction results
-    
+
     Args:
         pages_data: List of page information dictionaries
-        
+        hover: Whether to attach the per-point hover template
+
     Returns:
         Plotly figure object or None if creation fails
     """
     try:
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         if not pages_data:
             logger.warning("No pages data provided for visualization")
             return None
         
         # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(pages_data)
+        df = pd.DataFrame(_page_records(pages_data))
         
         # Create subplots
         fig = make_subplots(
@@ -61,12 +101,21 @@ def create_extraction_visualization(pages_data: List[Dict]) -> Optional[go.Figur
             row=1, col=1
         )
         
-        # 2. Elements per Page Scatter Plot
+        # 2. Elements per Page Scatter Plot (WebGL-backed, downsampled
+        # for very large page counts)
         if 'elements_count' in df.columns:
+            if len(df) > _MAX_SCATTER_POINTS:
+                step = len(df) // _MAX_SCATTER_POINTS + 1
+                scatter_x = df.index[::step]
+                scatter_y = df['elements_count'].iloc[::step]
+            else:
+                scatter_x = df.index
+                scatter_y = df['elements_count']
+
             fig.add_trace(
-                go.Scatter(
-                    x=df.index,
-                    y=df['elements_count'],
+                go.Scattergl(
+                    x=scatter_x,
+                    y=scatter_y,
                     mode='markers+lines',
                     name="Elements Trend",
                     marker=dict(size=10, color='orange')
@@ -86,8 +135,11 @@ def create_extraction_visualization(pages_data: List[Dict]) -> Optional[go.Figur
             )
         
         # 4. File Type Pie Chart
-        file_extensions = df['filename'].str.extract(r'\.(\w+)$')[0].value_counts() if 'filename' in df.columns else pd.Series({'xml': len(df)})
-        
+        if 'filename' in df.columns:
+            file_extensions = _ext_counts(df['filename'].tolist())
+        else:
+            file_extensions = pd.Series({'xml': len(df)})
+
         fig.add_trace(
             go.Pie(
                 labels=file_extensions.index,
@@ -114,7 +166,14 @@ def create_extraction_visualization(pages_data: List[Dict]) -> Optional[go.Figur
         fig.update_yaxes(title_text="Element Count", row=1, col=1)
         fig.update_yaxes(title_text="Element Count", row=1, col=2)
         fig.update_yaxes(title_text="Frequency", row=2, col=1)
-        
+
+        if hover:
+            fig.update_traces(
+                hovertemplate="<b>%{x}</b><br>" +
+                            "Elements: %{y}<br>" +
+                            "<extra></extra>"
+            )
+
         logger.info("Visualization created successfully")
         return fig
         
@@ -122,7 +181,7 @@ def create_extraction_visualization(pages_data: List[Dict]) -> Optional[go.Figur
         logger.error(f"Error creating visualization: {str(e)}")
         return None
 
-def create_page_comparison_chart(pages_data: List[Dict]) -> Optional[go.Figure]:
+def create_page_comparison_chart(pages_data: List[Dict]) -> Optional["go.Figure"]:
     """
     Create a comparison chart for pages
     
@@ -133,19 +192,22 @@ def create_page_comparison_chart(pages_data: List[Dict]) -> Optional[go.Figure]:
         Plotly figure for page comparison
     """
     try:
+        import plotly.graph_objects as go
+
         if not pages_data:
             return None
-        
-        df = pd.DataFrame(pages_data)
-        
+
+        # Only two fields are plotted - no need for a DataFrame build
+        names, counts, _ = _extract_cols(pages_data)
+
         fig = go.Figure()
-        
+
         # Bar chart comparing pages
         fig.add_trace(
             go.Bar(
-                x=df['name'] if 'name' in df.columns else [f"Page {i+1}" for i in range(len(df))],
-                y=df['elements_count'] if 'elements_count' in df.columns else [1] * len(df),
-                text=df['elements_count'] if 'elements_count' in df.columns else [1] * len(df),
+                x=names,
+                y=counts,
+                text=counts,
                 textposition='auto',
                 marker_color='steelblue'
             )
@@ -176,45 +238,53 @@ def create_extraction_summary_table(extraction_data: Dict) -> Optional[pd.DataFr
         Pandas DataFrame with summary information
     """
     try:
-        pages = extraction_data.get('pages', [])
+        pages = _page_records(extraction_data.get('pages', []))
         
         if not pages:
             return None
         
-        # Create summary data
+        # Pull the counts into one int64 array: the total comes from a
+        # vectorized sum instead of a Python-level per-page loop
+        counts = np.fromiter(
+            (p.get('elements_count', 0) for p in pages),
+            dtype=np.int64, count=len(pages)
+        )
+        total_elements = int(counts.sum())
+
         summary_data = []
-        
-        for i, page in enumerate(pages, 1):
+        for i, (page, elements) in enumerate(zip(pages, counts.tolist()), 1):
             summary_data.append({
                 'Page #': i,
                 'Page Name': page.get('name', 'Unnamed'),
                 'Filename': page.get('filename', 'unknown.xml'),
-                'Elements': page.get('elements_count', 0),
+                'Elements': elements,
                 'Root Tag': page.get('root_tag', 'Unknown'),
                 'Status': '✅ Extracted'
             })
-        
-        df = pd.DataFrame(summary_data)
-        
-        # Add total row
-        total_row = {
+
+        # Append the total row before the single DataFrame build - no
+        # post-hoc concat/reallocation
+        summary_data.append({
             'Page #': 'TOTAL',
             'Page Name': f"{len(pages)} pages",
             'Filename': f"{len(pages)} files",
-            'Elements': sum(page.get('elements_count', 0) for page in pages),
+            'Elements': total_elements,
             'Root Tag': 'Various',
             'Status': '✅ Complete'
-        }
-        
-        df = pd.concat([df, pd.DataFrame([total_row])], ignore_index=True)
-        
+        })
+
+        df = pd.DataFrame(
+            summary_data,
+            columns=['Page #', 'Page Name', 'Filename', 'Elements', 'Root Tag', 'Status']
+        )
+
         return df
         
     except Exception as e:
         logger.error(f"Error creating summary table: {str(e)}")
         return None
 
-def create_matplotlib_visualization(pages_data: List[Dict]) -> Optional[plt.Figure]:
+def create_matplotlib_visualization(pages_data: List[Dict]) -> Optional["plt.Figure"]:
     """
     Create matplotlib visualization as alternative to Plotly
     
@@ -225,45 +295,50 @@ def create_matplotlib_visualization(pages_data: List[Dict]) -> Optional[plt.Figu
         Matplotlib figure object
     """
     try:
+        import matplotlib
+        # Headless backend: the figure is returned, never shown, so skip
+        # GUI backend init and any X/Qt loading
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
         if not pages_data:
             return None
-        
-        df = pd.DataFrame(pages_data)
-        
-        # Set up the matplotlib figure
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+
+        # Only three fields are plotted - no need for a DataFrame build
+        names, counts, filenames = _extract_cols(pages_data)
+        n = len(counts)
+
+        # Set up the matplotlib figure; constrained_layout replaces the
+        # extra tight_layout() pass at the end
+        with plt.ioff():
+            fig, axes = plt.subplots(2, 2, figsize=(15, 10), constrained_layout=True)
         fig.suptitle('VSDX Extraction Analysis', fontsize=16)
-        
+
         # 1. Bar chart of elements per page
-        if 'name' in df.columns and 'elements_count' in df.columns:
-            axes[0, 0].bar(range(len(df)), df['elements_count'], color='skyblue')
-            axes[0, 0].set_title('Elements per Page')
-            axes[0, 0].set_xlabel('Page Index')
-            axes[0, 0].set_ylabel('Element Count')
-            axes[0, 0].set_xticks(range(len(df)))
-            axes[0, 0].set_xticklabels([f"P{i+1}" for i in range(len(df))], rotation=45)
-        
+        axes[0, 0].bar(range(n), counts, color='skyblue')
+        axes[0, 0].set_title('Elements per Page')
+        axes[0, 0].set_xlabel('Page Index')
+        axes[0, 0].set_ylabel('Element Count')
+        axes[0, 0].set_xticks(range(n))
+        axes[0, 0].set_xticklabels([f"P{i+1}" for i in range(n)], rotation=45)
+
         # 2. Line plot of element trend
-        if 'elements_count' in df.columns:
-            axes[0, 1].plot(df.index, df['elements_count'], marker='o', color='orange')
-            axes[0, 1].set_title('Element Count Trend')
-            axes[0, 1].set_xlabel('Page Index')
-            axes[0, 1].set_ylabel('Element Count')
-        
+        axes[0, 1].plot(range(n), counts, marker='o', color='orange')
+        axes[0, 1].set_title('Element Count Trend')
+        axes[0, 1].set_xlabel('Page Index')
+        axes[0, 1].set_ylabel('Element Count')
+
         # 3. Histogram of element distribution
-        if 'elements_count' in df.columns:
-            axes[1, 0].hist(df['elements_count'], bins=max(5, len(df)//2), color='lightgreen', alpha=0.7)
-            axes[1, 0].set_title('Element Count Distribution')
-            axes[1, 0].set_xlabel('Element Count')
-            axes[1, 0].set_ylabel('Frequency')
-        
+        axes[1, 0].hist(counts, bins=max(5, n//2), color='lightgreen', alpha=0.7)
+        axes[1, 0].set_title('Element Count Distribution')
+        axes[1, 0].set_xlabel('Element Count')
+        axes[1, 0].set_ylabel('Frequency')
+
         # 4. Pie chart of file types
-        if 'filename' in df.columns:
-            file_extensions = df['filename'].str.extract(r'\.(\w+)$')[0].value_counts()
-            axes[1, 1].pie(file_extensions.values, labels=file_extensions.index, autopct='%1.1f%%')
-            axes[1, 1].set_title('File Types')
-        
-        plt.tight_layout()
+        file_extensions = _ext_counts(filenames)
+        axes[1, 1].pie(file_extensions.values, labels=file_extensions.index, autopct='%1.1f%%')
+        axes[1, 1].set_title('File Types')
+
         return fig
         
     except Exception as e:
@@ -293,35 +368,56 @@ def export_visualization(fig, filename: str, format: str = 'png'):
     except Exception as e:
         logger.error(f"Error exporting visualization: {str(e)}")
 
-def create_interactive_dashboard(extraction_data: Dict) -> Optional[go.Figure]:
+@functools.lru_cache(maxsize=8)
+def _build_dashboard_fig(pages_key: tuple) -> Optional["go.Figure"]:
+    """
+    Build (and memoize) the base dashboard figure for a set of pages
+
+    Keyed by a hashable tuple of the page fields the dashboard actually
+    plots, so re-rendering the same extraction skips the DataFrame build
+    and subplot construction.
+    """
+    pages = [
+        {'name': n, 'filename': f, 'elements_count': c, 'root_tag': r}
+        for n, f, c, r in pages_key
+    ]
+    return create_extraction_visualization(pages, hover=True)
+
+def create_interactive_dashboard(extraction_data: Dict) -> Optional["go.Figure"]:
     """
     Create an interactive dashboard combining multiple visualizations
-    
+
     Args:
         extraction_data: Complete extraction data
-        
+
     Returns:
         Interactive Plotly dashboard
     """
     try:
-        pages = extraction_data.get('pages', [])
-        
+        pages = _page_records(extraction_data.get('pages', []))
+
         if not pages:
             return None
-        
-        # Create main visualization
-        main_fig = create_extraction_visualization(pages)
-        
-        if main_fig:
-            # Add interactivity
-            main_fig.update_traces(
-                hovertemplate="<b>%{x}</b><br>" +
-                            "Elements: %{y}<br>" +
-                            "<extra></extra>"
+
+        pages_key = tuple(
+            (
+                p.get('name', ''),
+                p.get('filename', ''),
+                p.get('elements_count', 0),
+                p.get('root_tag', ''),
             )
-        
+            for p in pages
+        )
+        main_fig = _build_dashboard_fig(pages_key)
+
+        if main_fig:
+            import plotly.graph_objects as go
+
+            # Hand out a copy so callers can't mutate the memoized figure
+            main_fig = go.Figure(main_fig)
+
         return main_fig
-        
+
     except Exception as e:
         logger.error(f"Error creating interactive dashboard: {str(e)}")
         return None
\ No newline at end of file
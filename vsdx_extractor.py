@@ -3,20 +3,136 @@ VSDX Extraction Tool
 A Python tool to extract and analyze VSDX (Visio) files
 """
 
+import hashlib
+import io
 import zipfile
-import xml.etree.ElementTree as ET
 import os
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-import tempfile
 import shutil
 
+# Prefer lxml's C-backed parser for the XML-parse-bound hot path;
+# fall back to the stdlib parser if lxml is not installed
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+
+if HAS_LXML:
+    # Precompiled XPath runs entirely in libxml2; count() avoids
+    # materializing a Python list of every descendant
+    _COUNT_DESC = ET.XPath("count(descendant::*)")
+    # string() with [1] predicates lets libxml2 stop at the first match
+    # instead of collecting every candidate node
+    _PAGE_NAME = ET.XPath(
+        "string(.//*[local-name()='PageSheet'][1]"
+        "//*[local-name()='Cell'][@N='PageName'][1]/@V)"
+    )
+
+    # lxml parsers aren't safe to share across threads, so the page pool
+    # gets one reusable parser per worker instead of one per parse
+    _PARSER_LOCAL = threading.local()
+
+    def _thread_parser() -> "ET.XMLParser":
+        """Return this thread's reusable parser, creating it on first use"""
+        parser = getattr(_PARSER_LOCAL, 'parser', None)
+        if parser is None:
+            parser = ET.XMLParser(collect_ids=False, huge_tree=True)
+            _PARSER_LOCAL.parser = parser
+        return parser
+
+# Optional compiled element counter (see _vsdx_walk.pyx / setup.py)
+try:
+    from _vsdx_walk import count_elements as _count_elements
+except ImportError:
+    def _count_elements(root):
+        """Pure-Python fallback: count descendant elements of a node"""
+        return sum(1 for _ in root.iter()) - 1
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Below this many pages the thread-pool dispatch overhead isn't worth it
+_MIN_PAGES_FOR_POOL = 4
+
+@dataclass(slots=True)
+class PageInfo:
+    """
+    Metadata for a single extracted page
+
+    Slotted so multi-page documents don't pay a per-page instance dict.
+    """
+    filename: str
+    output_path: str
+    elements_count: int
+    root_tag: str
+    name: str = ''
+
+def _find_page_name(root) -> str:
+    """Locate the PageName cell in a fully parsed page tree"""
+    for elem in root.iter():
+        if 'PageSheet' in elem.tag:
+            # Look for name property
+            for cell in elem.findall('.//Cell'):
+                if cell.get('N') == 'PageName':
+                    return cell.get('V', 'Unnamed')
+            break
+    return ''
+
+def _parse_page(data: bytes, output_dir: str, page_filename: str) -> Optional[PageInfo]:
+    """
+    Process the raw XML bytes of a single page and return its metadata
+
+    Module-level and free of extractor state so executor workers can run
+    it directly.
+    """
+    try:
+        output_path = os.path.join(output_dir, page_filename)
+
+        if HAS_LXML:
+            # One C-level parse, then compiled XPath for the count and
+            # page name
+            root = ET.fromstring(data, _thread_parser())
+            elements_count = int(_COUNT_DESC(root))
+            name = _PAGE_NAME(root)
+            root_tag = root.tag
+        else:
+            root = ET.fromstring(data)
+            name = _find_page_name(root)
+            elements_count = _count_elements(root)
+            root_tag = root.tag
+
+        # The saved copy mirrors the input on both paths - a single
+        # buffered write of the original bytes, no serializer involved
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+        if not name:
+            name = page_filename.replace('.xml', '')
+
+        page_info = PageInfo(
+            filename=page_filename,
+            output_path=output_path,
+            elements_count=elements_count,
+            root_tag=root_tag,
+            name=name,
+        )
+
+        logger.info(f"Processed page: {page_filename}")
+        return page_info
+
+    except Exception as e:
+        logger.error(f"Error processing page {page_filename}: {str(e)}")
+        return None
+
 class VSDXExtractor:
     """
     A class to extract and analyze VSDX files
@@ -26,7 +142,11 @@ class VSDXExtractor:
     def __init__(self):
         self.extracted_data = {}
         self.pages_info = []
-        self.temp_dir = None
+        # One parser for all sequential parses instead of a fresh one per
+        # file; None keeps the stdlib parse() calls on their default
+        self._parser = (
+            ET.XMLParser(collect_ids=False, huge_tree=True) if HAS_LXML else None
+        )
     
     def extract_vsdx(self, vsdx_path: str, output_dir: str = None) -> Dict:
         """
@@ -44,98 +164,136 @@ class VSDXExtractor:
         
         if output_dir is None:
             output_dir = f"{vsdx_path}_extracted"
-        
+
+        return self._extract_archive(vsdx_path, output_dir)
+
+    def extract_vsdx_bytes(self, buf, output_dir: str = None) -> Dict:
+        """
+        Extract VSDX contents directly from in-memory bytes
+
+        Avoids the temp-file write/read round trip for uploads that are
+        already held in memory (e.g. Streamlit uploads).
+
+        Args:
+            buf: VSDX content as bytes or a BytesIO buffer
+            output_dir: Directory to save extracted XML files; defaults
+                to a directory derived from the content hash, so
+                successive uploads never share (and pollute) one dir
+
+        Returns:
+            Dictionary containing extracted data and metadata
+        """
+        if isinstance(buf, (bytes, bytearray)):
+            data = bytes(buf)
+        else:
+            data = buf.read()
+
+        if output_dir is None:
+            digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+            output_dir = f"vsdx_extracted_{digest}"
+
+        return self._extract_archive(io.BytesIO(data), output_dir)
+
+    def _extract_archive(self, zip_source, output_dir: str) -> Dict:
+        """
+        Extract and process a VSDX archive from a path or file-like object
+        """
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
-        
-        # Create temporary directory for extraction
-        self.temp_dir = tempfile.mkdtemp()
-        
+
         try:
-            # Extract VSDX (ZIP) file
-            with zipfile.ZipFile(vsdx_path, 'r') as zip_ref:
-                zip_ref.extractall(self.temp_dir)
-                logger.info(f"Extracted VSDX to temporary directory: {self.temp_dir}")
-            
-            # Process extracted files
-            self._process_extracted_files(self.temp_dir, output_dir)
-            
+            # Read the needed entries straight from the archive instead of
+            # extracting everything to a temp dir and re-reading it
+            with zipfile.ZipFile(zip_source, 'r') as zip_ref:
+                self._process_zip(zip_ref, output_dir)
+
             return {
                 'success': True,
                 'output_dir': output_dir,
                 'pages': self.pages_info,
                 'extracted_data': self.extracted_data
             }
-            
+
         except Exception as e:
             logger.error(f"Error extracting VSDX: {str(e)}")
             return {
                 'success': False,
                 'error': str(e)
             }
-        finally:
-            # Clean up temporary directory
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
-    
-    def _process_extracted_files(self, temp_dir: str, output_dir: str):
+
+    def _process_zip(self, zip_ref: zipfile.ZipFile, output_dir: str):
         """
-        Process the extracted files and save relevant XML files
+        Process the relevant archive entries and save their XML files
         """
-        # Key directories and files in VSDX structure
-        visio_dir = os.path.join(temp_dir, 'visio')
-        pages_dir = os.path.join(visio_dir, 'pages')
-        
+        names = zip_ref.namelist()
+
         # Process app.xml for document properties
-        app_xml_path = os.path.join(temp_dir, 'docProps', 'app.xml')
-        if os.path.exists(app_xml_path):
-            self._process_app_xml(app_xml_path, output_dir)
-        
+        if 'docProps/app.xml' in names:
+            self._process_app_xml(zip_ref, 'docProps/app.xml', output_dir)
+
         # Process document.xml for document structure
-        doc_xml_path = os.path.join(visio_dir, 'document.xml')
-        if os.path.exists(doc_xml_path):
-            self._process_document_xml(doc_xml_path, output_dir)
-        
-        # Process pages
-        if os.path.exists(pages_dir):
-            self._process_pages(pages_dir, output_dir)
-        
+        if 'visio/document.xml' in names:
+            self._process_document_xml(zip_ref, 'visio/document.xml', output_dir)
+
+        # Process pages (direct children of visio/pages only, as before)
+        page_names = sorted(
+            n for n in names
+            if n.startswith('visio/pages/') and n.endswith('.xml')
+            and '/' not in n[len('visio/pages/'):]
+        )
+        if page_names:
+            self._process_pages(zip_ref, page_names, output_dir)
+
         # Process masters (stencils/templates)
-        masters_dir = os.path.join(visio_dir, 'masters')
-        if os.path.exists(masters_dir):
-            self._process_masters(masters_dir, output_dir)
-    
-    def _process_app_xml(self, app_xml_path: str, output_dir: str):
+        master_names = sorted(
+            n for n in names
+            if n.startswith('visio/masters/') and n.endswith('.xml')
+            and '/' not in n[len('visio/masters/'):]
+        )
+        if master_names:
+            self._process_masters(zip_ref, master_names, output_dir)
+
+    def _process_app_xml(self, zip_ref: zipfile.ZipFile, name: str, output_dir: str):
         """Process application properties XML"""
         try:
-            tree = ET.parse(app_xml_path)
-            root = tree.getroot()
-            
-            # Save processed XML
+            # One decompression serves both the parse and the mirror copy
+            data = zip_ref.read(name)
+            root = ET.fromstring(data, self._parser)
+
             output_path = os.path.join(output_dir, 'app_properties.xml')
-            tree.write(output_path, encoding='utf-8', xml_declaration=True)
+            with open(output_path, 'wb') as f:
+                f.write(data)
             
             # Extract basic properties
-            self.extracted_data['app_properties'] = {}
-            for child in root:
-                if child.text:
-                    tag_name = child.tag.split('}')[-1] if '}' in child.tag else child.tag
-                    self.extracted_data['app_properties'][tag_name] = child.text
+            if HAS_LXML:
+                # QName.localname strips the namespace in C instead of a
+                # Python-level string split per child
+                self.extracted_data['app_properties'] = {
+                    ET.QName(child).localname: child.text
+                    for child in root if child.text
+                }
+            else:
+                self.extracted_data['app_properties'] = {}
+                for child in root:
+                    if child.text:
+                        tag_name = child.tag.split('}')[-1] if '}' in child.tag else child.tag
+                        self.extracted_data['app_properties'][tag_name] = child.text
             
             logger.info("Processed app.xml")
             
         except Exception as e:
             logger.error(f"Error processing app.xml: {str(e)}")
     
-    def _process_document_xml(self, doc_xml_path: str, output_dir: str):
+    def _process_document_xml(self, zip_ref: zipfile.ZipFile, name: str, output_dir: str):
         """Process main document XML"""
         try:
-            tree = ET.parse(doc_xml_path)
-            root = tree.getroot()
-            
-            # Save processed XML
+            # One decompression serves both the parse and the mirror copy
+            data = zip_ref.read(name)
+            root = ET.fromstring(data, self._parser)
+
             output_path = os.path.join(output_dir, 'document.xml')
-            tree.write(output_path, encoding='utf-8', xml_declaration=True)
+            with open(output_path, 'wb') as f:
+                f.write(data)
             
             # Extract document info
             self.extracted_data['document_info'] = {
@@ -148,72 +306,50 @@ class VSDXExtractor:
         except Exception as e:
             logger.error(f"Error processing document.xml: {str(e)}")
     
-    def _process_pages(self, pages_dir: str, output_dir: str):
+    def _process_pages(self, zip_ref: zipfile.ZipFile, page_names: List[str], output_dir: str):
         """Process all pages in the VSDX file"""
         pages_output_dir = os.path.join(output_dir, 'pages')
         os.makedirs(pages_output_dir, exist_ok=True)
-        
-        page_files = [f for f in os.listdir(pages_dir) if f.endswith('.xml')]
-        
-        for page_file in page_files:
-            page_path = os.path.join(pages_dir, page_file)
-            self._process_single_page(page_path, pages_output_dir, page_file)
-    
-    def _process_single_page(self, page_path: str, output_dir: str, page_filename: str):
-        """Process a single page XML file"""
-        try:
-            tree = ET.parse(page_path)
-            root = tree.getroot()
-            
-            # Save the page XML
-            output_path = os.path.join(output_dir, page_filename)
-            tree.write(output_path, encoding='utf-8', xml_declaration=True)
-            
-            # Extract page information
-            page_info = {
-                'filename': page_filename,
-                'output_path': output_path,
-                'elements_count': len(root.findall('.//*')),
-                'root_tag': root.tag
-            }
-            
-            # Try to extract page name and ID
-            for elem in root.iter():
-                if 'PageSheet' in elem.tag:
-                    # Look for name property
-                    for cell in elem.findall('.//Cell'):
-                        if cell.get('N') == 'PageName':
-                            page_info['name'] = cell.get('V', 'Unnamed')
-                            break
-                    break
-            
-            if 'name' not in page_info:
-                page_info['name'] = page_filename.replace('.xml', '')
-            
-            self.pages_info.append(page_info)
-            logger.info(f"Processed page: {page_filename}")
-            
-        except Exception as e:
-            logger.error(f"Error processing page {page_filename}: {str(e)}")
-    
-    def _process_masters(self, masters_dir: str, output_dir: str):
+
+        # Read raw bytes up front (ZipFile reads aren't safe to issue from
+        # multiple threads), then hand parsing to the pool
+        page_files = [n.rsplit('/', 1)[-1] for n in page_names]
+        page_blobs = [zip_ref.read(n) for n in page_names]
+        out_dirs = [pages_output_dir] * len(page_files)
+
+        if len(page_files) >= _MIN_PAGES_FOR_POOL:
+            # XML parsing releases the GIL in the C-backed parser, so
+            # threads give near-linear speedup on multi-page documents
+            cpu = os.cpu_count() or 1
+            chunksize = max(1, len(page_files) // (4 * cpu))
+            with ThreadPoolExecutor(max_workers=cpu) as executor:
+                results = list(executor.map(
+                    _parse_page, page_blobs, out_dirs, page_files, chunksize=chunksize
+                ))
+        else:
+            results = [
+                _parse_page(data, pages_output_dir, name)
+                for data, name in zip(page_blobs, page_files)
+            ]
+
+        self.pages_info.extend(info for info in results if info is not None)
+
+    def _process_masters(self, zip_ref: zipfile.ZipFile, master_names: List[str], output_dir: str):
         """Process master shapes/stencils"""
         masters_output_dir = os.path.join(output_dir, 'masters')
         os.makedirs(masters_output_dir, exist_ok=True)
-        
-        master_files = [f for f in os.listdir(masters_dir) if f.endswith('.xml')]
-        
-        for master_file in master_files:
-            master_path = os.path.join(masters_dir, master_file)
+
+        for name in master_names:
+            master_file = name.rsplit('/', 1)[-1]
             try:
-                tree = ET.parse(master_path)
-                
-                # Save the master XML
+                # Nothing is extracted from masters, so copy the bytes
+                # verbatim without a parse/serialize round trip
                 output_path = os.path.join(masters_output_dir, master_file)
-                tree.write(output_path, encoding='utf-8', xml_declaration=True)
-                
+                with zip_ref.open(name) as src, open(output_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, length=1 << 20)
+
                 logger.info(f"Processed master: {master_file}")
-                
+
             except Exception as e:
                 logger.error(f"Error processing master {master_file}: {str(e)}")
     
@@ -248,7 +384,7 @@ def main():
         
         summary = extractor.get_extraction_summary()
         print("\nSummary:")
-        print(json.dumps(summary, indent=2))
+        print(json.dumps(summary, indent=2, default=asdict))
     else:
         print(f"Extraction failed: {result['error']}")
 